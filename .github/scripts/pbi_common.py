@@ -0,0 +1,226 @@
+# pbi_common.py
+"""
+Shared helpers for the Power BI / Fabric workspace scripts:
+HTTP session, Azure AD authentication and workspace listing.
+
+Imported by the create/delete scripts, which run as
+`python .github/scripts/<script>.py` and so have this directory on sys.path.
+"""
+
+import os
+import hashlib
+import json
+import tempfile
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import logging
+from typing import Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Power BI REST endpoints
+GROUPS_URL = "https://api.powerbi.com/v1.0/myorg/groups"
+
+# Seconds; without a timeout a hung socket never raises and is never retried
+REQUEST_TIMEOUT = 30
+
+# Cached tokens are treated as expired this many seconds early
+TOKEN_EXPIRY_MARGIN = 60
+
+
+# -------------------------------
+# HTTP Session
+# -------------------------------
+class IdempotentRetry(Retry):
+    """
+    Retries POST only on 429 (the request was rejected, so nothing was created);
+    a POST that hit a 5xx or a dropped connection may already have taken effect
+    """
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if method == "POST":
+            return status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def build_session(pool_maxsize: int = 10) -> requests.Session:
+    """
+    Creates a Session that keeps connections to the API alive across calls
+    and retries throttled / transient failures
+    """
+    session = requests.Session()
+    retry = IdempotentRetry(
+        total=8,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "DELETE"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=pool_maxsize, max_retries=retry))
+    return session
+
+
+# -------------------------------
+# Token cache (GitHub Actions only)
+# -------------------------------
+def _token_cache_path(tenant_id: str, client_id: str) -> str | None:
+    """
+    The token is only cached inside a GitHub Actions job ($RUNNER_TEMP, wiped
+    when the job ends); local runs never write it to disk
+    """
+    runner_temp = os.getenv("RUNNER_TEMP")
+    if not runner_temp:
+        return None
+    digest = hashlib.sha256(f"{client_id}{tenant_id}".encode()).hexdigest()[:16]
+    return os.path.join(runner_temp, f"pbi_token_{digest}.json")
+
+
+def _read_cached_token(path: str) -> str | None:
+    """
+    Returns the cached token if it is still valid and the file is a regular
+    file owned by the current user and not readable by others
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    except OSError:
+        return None
+
+    with os.fdopen(fd) as f:
+        st = os.fstat(f.fileno())
+        if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+            logger.warning(f"Ignoring token cache with unsafe owner/permissions: {path}")
+            return None
+        try:
+            cached = json.load(f)
+            if time.time() < cached["exp"]:
+                return cached["access_token"]
+        except (ValueError, KeyError, TypeError):
+            pass
+    return None
+
+
+def _write_cached_token(path: str, token: str, expires_in: int):
+    """
+    Writes the token to a fresh 0600 temp file and atomically moves it into place
+    """
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".pbi_token_")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({
+                    "access_token": token,
+                    "exp": time.time() + expires_in - TOKEN_EXPIRY_MARGIN
+                }, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"Could not cache access token: {e}")
+
+
+# -------------------------------
+# Microsoft Authentication
+# -------------------------------
+def get_access_token(session: requests.Session, tenant_id: str, client_id: str, client_secret: str) -> str:
+    """
+    Requests a new token from Azure AD (client credentials) and caches it when running on Actions
+    """
+    url = f"https://login.microsoftonline.com/{tenant_id}/oauth2/v2.0/token"
+    payload = {
+        "client_id": client_id,
+        "scope": "https://analysis.windows.net/powerbi/api/.default",
+        "client_secret": client_secret,
+        "grant_type": "client_credentials"
+    }
+
+    # Drop the session's bearer/JSON headers when re-authenticating mid-run
+    resp = session.post(url, data=payload, timeout=REQUEST_TIMEOUT, headers={
+        "Authorization": None,
+        "Content-Type": "application/x-www-form-urlencoded"
+    })
+    if resp.status_code != 200:
+        logger.error(f"Authentication failed: {resp.status_code} - {resp.text}")
+        exit(1)
+
+    logger.info("Authentication successful")
+    data = resp.json()
+    token = data["access_token"]
+
+    cache_path = _token_cache_path(tenant_id, client_id)
+    if cache_path:
+        _write_cached_token(cache_path, token, int(data.get("expires_in", 0)))
+    return token
+
+
+def authenticate(session: requests.Session, tenant_id: str, client_id: str, client_secret: str):
+    """
+    Sets the bearer token on the session, preferring a cached one.
+
+    A cached token is only checked by the workspace listing (the first API call
+    in both scripts): if that GET returns 401 the cache is discarded, a new token
+    fetched and the GET resent once. 401s on later calls are real permission
+    errors and are returned unchanged.
+    """
+    cache_path = _token_cache_path(tenant_id, client_id)
+    token = _read_cached_token(cache_path) if cache_path else None
+
+    if token:
+        logger.info("Using cached access token")
+        refreshed = False
+
+        def refresh_on_401(resp, *args, **kwargs):
+            nonlocal refreshed
+            if refreshed or resp.status_code != 401 or resp.request.method != "GET" \
+                    or not resp.url.startswith(GROUPS_URL):
+                return resp
+
+            refreshed = True
+            logger.warning("Cached access token rejected → requesting a new one")
+            try:
+                os.unlink(cache_path)
+            except OSError:
+                pass
+            session.headers["Authorization"] = f"Bearer {get_access_token(session, tenant_id, client_id, client_secret)}"
+
+            # Release the 401's connection back to the pool before resending
+            resp.content
+            resp.close()
+            req = resp.request.copy()
+            req.headers["Authorization"] = session.headers["Authorization"]
+            return session.send(req, **kwargs)
+
+        session.hooks["response"].append(refresh_on_401)
+    else:
+        token = get_access_token(session, tenant_id, client_id, client_secret)
+
+    session.headers.update({
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    })
+
+
+# -------------------------------
+# Power BI REST API Helpers
+# -------------------------------
+def list_workspaces(session: requests.Session, page_size: int = 5000) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (name, id) for every workspace; raises requests.HTTPError if any page fails
+    """
+    skip = 0
+    while True:
+        resp = session.get(f"{GROUPS_URL}?$top={page_size}&$skip={skip}", timeout=REQUEST_TIMEOUT)
+        if resp.status_code != 200:
+            raise requests.HTTPError(
+                f"Failed to list workspaces: {resp.status_code} - {resp.text}", response=resp
+            )
+
+        batch = resp.json().get("value", [])
+        if not batch:
+            return
+
+        for ws in batch:
+            yield ws.get("name", "").strip(), ws["id"]
+        skip += len(batch)
@@ -7,20 +7,64 @@ Supports selective environment creation via environment variables:
 CREATE_DEV, CREATE_UAT, CREATE_PRD (true/false strings from GitHub Actions)
 
 Requirements:
-- Python 3.8+
-- pip install python-dotenv requests
+- Python 3.10+
+- pip install requests
 """
 
 import os
+import re
 import requests
-from dotenv import load_dotenv
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List
 
+from pbi_common import GROUPS_URL, REQUEST_TIMEOUT, authenticate, build_session, list_workspaces
+
 # -------------------------------
 # CONFIGURATION & LOGGING
 # -------------------------------
-load_dotenv()
+def _find_env(filename: str = ".env") -> str | None:
+    """
+    Looks for the file next to this script and in each parent directory,
+    like python-dotenv's find_dotenv()
+    """
+    path = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(path, filename)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _load_env():
+    """
+    Minimal .env loader for local runs; existing environment variables win
+    """
+    path = _find_env()
+    if not path:
+        return
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("export "):
+                line = line[len("export "):].lstrip()
+            if line and not line.startswith("#") and "=" in line:
+                key, value = line.split("=", 1)
+                value = value.strip()
+                quoted = re.match(r"""^(["'])(.*?)\1(\s+#.*)?$""", value)
+                if quoted:
+                    value = quoted.group(2)
+                else:
+                    value = re.split(r"\s+#", value, maxsplit=1)[0]
+                os.environ.setdefault(key.strip(), value)
+
+
+# GitHub Actions already provides everything via env
+if os.getenv("GITHUB_ACTIONS") != "true":
+    _load_env()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -53,47 +97,35 @@ if missing:
 if not FABRIC_CAPACITY_ID:
     logger.warning("FABRIC_CAPACITY_ID not set → workspaces will be created without assigned capacity")
 
+# Cheap sanity check so malformed addresses never reach the API
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
-# -------------------------------
-# Microsoft Authentication
-# -------------------------------
-def get_access_token() -> str:
-    url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
-    payload = {
-        "client_id": CLIENT_ID,
-        "scope": "https://analysis.windows.net/powerbi/api/.default",
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials"
-    }
+ENV_NAMES = ("DEV", "UAT", "PRD")
 
-    resp = requests.post(url, data=payload)
-    if resp.status_code != 200:
-        logger.error(f"Authentication failed: {resp.status_code} - {resp.text}")
-        exit(1)
+# Concurrent API calls; the session pool is sized to match
+MAX_WORKERS = 8
+ADMIN_MAX_WORKERS = 32
 
-    logger.info("Authentication successful")
-    return resp.json()["access_token"]
+# Power BI REST endpoints
+USERS_URL_TMPL = GROUPS_URL + "/{}/users"
 
 
 # -------------------------------
 # Power BI REST API Helpers
 # -------------------------------
-def create_workspace(token: str, name: str, capacity_id: str = None) -> dict | None:
+def create_workspace(session: requests.Session, name: str, capacity_id: str = None) -> dict | None:
     """
     Creates a workspace using the Power BI REST API
     """
-    url = "https://api.powerbi.com/v1.0/myorg/groups"
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
     body = {"name": name}
     if capacity_id:
         body["capacityId"] = capacity_id
 
-    resp = requests.post(url, headers=headers, json=body)
+    try:
+        resp = session.post(GROUPS_URL, json=body, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        logger.error(f"Failed to create workspace '{name}': {e}")
+        return None
 
     if resp.status_code in (200, 201):
         logger.info(f"Workspace created: {name}")
@@ -103,24 +135,19 @@ def create_workspace(token: str, name: str, capacity_id: str = None) -> dict | N
         return None
 
 
-def add_workspace_admin(token: str, workspace_id: str, email: str) -> bool:
+def add_workspace_admin(session: requests.Session, workspace_id: str, email: str) -> bool:
     """
     Adds a user as Admin to the workspace
     """
-    url = f"https://api.powerbi.com/v1.0/myorg/groups/{workspace_id}/users"
-
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-
-    body = {
-        "identifier": email,
-        "groupUserAccessRight": "Admin",
-        "principalType": "User"
-    }
-
-    resp = requests.post(url, headers=headers, json=body)
+    try:
+        resp = session.post(USERS_URL_TMPL.format(workspace_id), timeout=REQUEST_TIMEOUT, json={
+            "identifier": email,
+            "groupUserAccessRight": "Admin",
+            "principalType": "User"
+        })
+    except requests.RequestException as e:
+        logger.warning(f"  → Failed to add admin {email}: {e}")
+        return False
 
     if resp.status_code in (200, 201):
         logger.info(f"  → Added admin: {email}")
@@ -134,66 +161,118 @@ def add_workspace_admin(token: str, workspace_id: str, email: str) -> bool:
 # MAIN LOGIC
 # -------------------------------
 def main():
-    token = get_access_token()
-
-    # Parse base names
-    workspace_base_names: List[str] = [
-        name.strip() for name in WORKSPACE_NAMES_STR.split(",") if name.strip()
-    ]
-
-    admin_emails: List[str] = [
-        email.strip() for email in ADMIN_EMAILS_STR.split(",") if email.strip()
-    ]
-
-    if not workspace_base_names:
-        logger.error("No workspace names provided")
-        return
-
-    logger.info(f"Base workspace names: {', '.join(workspace_base_names)}")
-    if admin_emails:
-        logger.info(f"Admins to assign: {', '.join(admin_emails)}")
-    else:
-        logger.warning("No admin emails provided → only service principal will be member")
-
-    # ──── Determine which environments to create ────
-    create_dev = os.getenv("CREATE_DEV", "false").lower() in ("true", "1", "yes", "on")
-    create_uat = os.getenv("CREATE_UAT", "false").lower() in ("true", "1", "yes", "on")
-    create_prd = os.getenv("CREATE_PRD", "false").lower() in ("true", "1", "yes", "on")
-
-    selected_envs = []
-    if create_dev:
-        selected_envs.append(("DEV", "DEV"))
-    if create_uat:
-        selected_envs.append(("UAT", "UAT"))
-    if create_prd:
-        selected_envs.append(("PRD", "PRD"))
-
-    if not selected_envs:
-        logger.error("No environments selected (DEV/UAT/PRD). Nothing to create.")
-        logger.info("Tip: Check at least one environment box in GitHub Actions run dialog.")
-        return
-
-    logger.info(f"Selected environments: {', '.join([short for short, _ in selected_envs])}")
-
-    successes = 0
-
-    for base_name in workspace_base_names:
-        for env_short, env_display in selected_envs:
-            workspace_name = f"{base_name} {env_display}".strip()
-
-            logger.info(f"Creating: {workspace_name}")
-
-            ws = create_workspace(token, workspace_name, FABRIC_CAPACITY_ID)
-
-            if ws and "id" in ws:
-                successes += 1
-                workspace_id = ws["id"]
-
-                # Add admins if provided
-                for email in admin_emails:
-                    add_workspace_admin(token, workspace_id, email)
-
-    logger.info(f"Finished. Successfully created {successes} workspaces.")
+    with build_session(pool_maxsize=MAX_WORKERS + ADMIN_MAX_WORKERS) as session:
+        authenticate(session, TENANT_ID, CLIENT_ID, CLIENT_SECRET)
+
+        # Parse base names (drop env suffixes the caller already typed, then
+        # dedupe case-insensitively, keeping the first spelling)
+        unique_names = {}
+        for raw_name in WORKSPACE_NAMES_STR.split(","):
+            name = raw_name.strip()
+            if name.upper() in ENV_NAMES:
+                logger.warning(f"Skipping '{name}': an environment name on its own is not a base name")
+                continue
+            for env in ENV_NAMES:
+                if name.upper().endswith(f" {env}"):
+                    name = name[:-len(env)].strip()
+                    logger.warning(f"Removed '{env}' suffix from '{raw_name.strip()}' → base name '{name}'")
+            if name:
+                unique_names.setdefault(name.casefold(), name)
+        workspace_base_names: List[str] = list(unique_names.values())
+
+        admin_emails: List[str] = []
+        for email in dict.fromkeys(e.strip() for e in ADMIN_EMAILS_STR.split(",") if e.strip()):
+            if EMAIL_RE.match(email):
+                admin_emails.append(email)
+            else:
+                logger.warning(f"Skipping invalid admin email: {email}")
+
+        if not workspace_base_names:
+            logger.error("No workspace names provided")
+            return
+
+        logger.info(f"Base workspace names: {', '.join(workspace_base_names)}")
+        if admin_emails:
+            logger.info(f"Admins to assign: {', '.join(admin_emails)}")
+        else:
+            logger.warning("No admin emails provided → only service principal will be member")
+
+        # ──── Determine which environments to create ────
+        create_dev = os.getenv("CREATE_DEV", "false").lower() in ("true", "1", "yes", "on")
+        create_uat = os.getenv("CREATE_UAT", "false").lower() in ("true", "1", "yes", "on")
+        create_prd = os.getenv("CREATE_PRD", "false").lower() in ("true", "1", "yes", "on")
+
+        selected_envs = []
+        if create_dev:
+            selected_envs.append(("DEV", "DEV"))
+        if create_uat:
+            selected_envs.append(("UAT", "UAT"))
+        if create_prd:
+            selected_envs.append(("PRD", "PRD"))
+
+        if not selected_envs:
+            logger.error("No environments selected (DEV/UAT/PRD). Nothing to create.")
+            logger.info("Tip: Check at least one environment box in GitHub Actions run dialog.")
+            return
+
+        logger.info(f"Selected environments: {', '.join([short for short, _ in selected_envs])}")
+
+        successes = 0
+        skipped = 0
+
+        # Pre-flight: existing workspaces are reused instead of failing the POST.
+        # Names are matched case-insensitively, as Power BI does.
+        existing = {}
+        try:
+            for name, ws_id in list_workspaces(session):
+                existing.setdefault(name.casefold(), ws_id)
+        except requests.RequestException as e:
+            logger.warning(f"{e} → skipping pre-flight check, existing workspaces will fail to create")
+            existing = {}
+
+        workspace_names = [
+            f"{base_name} {env_display}".strip()
+            for base_name in workspace_base_names
+            for _, env_display in selected_envs
+        ]
+
+        # Admin adds get their own, wider pool so they never wait behind creates
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+                ThreadPoolExecutor(max_workers=ADMIN_MAX_WORKERS) as admin_executor:
+            admin_futures = []
+            create_futures = {}
+            for workspace_name in workspace_names:
+                existing_id = existing.get(workspace_name.casefold())
+                if existing_id:
+                    logger.info(f"Exists, skipping: {workspace_name}")
+                    skipped += 1
+                    for email in admin_emails:
+                        admin_futures.append(
+                            admin_executor.submit(add_workspace_admin, session, existing_id, email)
+                        )
+                    continue
+
+                logger.info(f"Creating: {workspace_name}")
+                future = executor.submit(create_workspace, session, workspace_name, FABRIC_CAPACITY_ID)
+                create_futures[future] = workspace_name
+
+            # Add admins as soon as each workspace exists
+            for future in as_completed(create_futures):
+                ws = future.result()
+
+                if ws and "id" in ws:
+                    successes += 1
+                    workspace_id = ws["id"]
+
+                    for email in admin_emails:
+                        admin_futures.append(
+                            admin_executor.submit(add_workspace_admin, session, workspace_id, email)
+                        )
+
+            for future in as_completed(admin_futures):
+                future.result()
+
+        logger.info(f"Finished. Successfully created {successes} workspaces ({skipped} already existed).")
 
 
 if __name__ == "__main__":
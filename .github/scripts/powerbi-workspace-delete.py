@@ -4,14 +4,15 @@ Deletes exactly the specified Power BI / Fabric workspaces by name.
 Used via GitHub Actions with full names provided as input.
 
 Requires:
-- Python 3.8+
+- Python 3.10+
 - pip install requests
 """
 
 import os
 import requests
 import logging
-from typing import List
+
+from pbi_common import GROUPS_URL, REQUEST_TIMEOUT, authenticate, build_session, list_workspaces
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,42 +30,16 @@ if not all([TENANT_ID, CLIENT_ID, CLIENT_SECRET, WORKSPACES_TO_DELETE]):
     logger.error("Missing required environment variables")
     exit(1)
 
+# Power BI REST endpoints
+GROUP_URL_TMPL = GROUPS_URL + "/{}"
 
-def get_access_token() -> str:
-    url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
-    payload = {
-        "client_id": CLIENT_ID,
-        "scope": "https://analysis.windows.net/powerbi/api/.default",
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials"
-    }
-
-    resp = requests.post(url, data=payload)
-    if resp.status_code != 200:
-        logger.error(f"Authentication failed: {resp.status_code} - {resp.text}")
-        exit(1)
-
-    logger.info("Authentication successful")
-    return resp.json()["access_token"]
-
-
-def list_workspaces(token: str) -> List[dict]:
-    url = "https://api.powerbi.com/v1.0/myorg/groups?$top=500"
-    headers = {"Authorization": f"Bearer {token}"}
-
-    resp = requests.get(url, headers=headers)
-    if resp.status_code != 200:
-        logger.error(f"Failed to list workspaces: {resp.status_code} - {resp.text}")
-        return []
 
-    return resp.json().get("value", [])
-
-
-def delete_workspace(token: str, workspace_id: str, name: str) -> bool:
-    url = f"https://api.powerbi.com/v1.0/myorg/groups/{workspace_id}"
-    headers = {"Authorization": f"Bearer {token}"}
-
-    resp = requests.delete(url, headers=headers)
+def delete_workspace(session: requests.Session, workspace_id: str, name: str) -> bool:
+    try:
+        resp = session.delete(GROUP_URL_TMPL.format(workspace_id), timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        logger.error(f"Delete failed for '{name}': {e}")
+        return False
 
     if resp.status_code in (200, 202, 204):
         logger.info(f"Deleted: {name} ({workspace_id})")
@@ -78,40 +53,36 @@ def delete_workspace(token: str, workspace_id: str, name: str) -> bool:
 
 
 def main():
-    token = get_access_token()
-
-    target_names = {n.strip() for n in WORKSPACES_TO_DELETE.split(",") if n.strip()}
-    if not target_names:
-        logger.error("No workspace names provided")
-        return
+    with build_session() as session:
+        authenticate(session, TENANT_ID, CLIENT_ID, CLIENT_SECRET)
 
-    logger.info(f"Workspaces targeted for deletion: {', '.join(sorted(target_names))}")
+        target_names = {n.strip() for n in WORKSPACES_TO_DELETE.split(",") if n.strip()}
+        if not target_names:
+            logger.error("No workspace names provided")
+            return
 
-    all_ws = list_workspaces(token)
-    if not all_ws:
-        logger.info("No workspaces accessible or API error")
-        return
+        logger.info(f"Workspaces targeted for deletion: {', '.join(sorted(target_names))}")
 
-    found = []
-    for ws in all_ws:
-        name = ws.get("name", "").strip()
-        if name in target_names:
-            found.append((name, ws["id"]))
+        try:
+            found = [(name, ws_id) for name, ws_id in list_workspaces(session) if name in target_names]
+        except requests.RequestException as e:
+            logger.error(f"{e} → API error, nothing deleted")
+            exit(1)
 
-    if not found:
-        logger.info("None of the specified workspaces were found")
-        return
+        if not found:
+            logger.info("None of the specified workspaces were found")
+            return
 
-    logger.info(f"Found {len(found)} matching workspaces:")
-    for name, wid in sorted(found):
-        logger.info(f"  • {name} ({wid})")
+        logger.info(f"Found {len(found)} matching workspaces:")
+        for name, wid in sorted(found):
+            logger.info(f"  • {name} ({wid})")
 
-    successes = 0
-    for name, ws_id in found:
-        if delete_workspace(token, ws_id, name):
-            successes += 1
+        successes = 0
+        for name, ws_id in found:
+            if delete_workspace(session, ws_id, name):
+                successes += 1
 
-    logger.info(f"Deletion completed. Successfully deleted {successes}/{len(found)} workspaces.")
+        logger.info(f"Deletion completed. Successfully deleted {successes}/{len(found)} workspaces.")
 
 
 if __name__ == "__main__":